@@ -2,9 +2,11 @@
 Account Management API Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import asyncio
+import time
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
+from cachetools import TTLCache
 
 from db.database import get_db
 from db.crud import AccountCRUD
@@ -18,7 +20,7 @@ from models.account import (
     TokenData,
 )
 from services.oauth_service import oauth_service
-from services.callback_server import callback_server
+from services.callback_server import callback_server, state_key
 from utils.logger import logger
 from config import settings
 
@@ -26,8 +28,19 @@ from config import settings
 router = APIRouter()
 
 
-# Store active OAuth states for validation
-active_oauth_flows: dict[str, dict] = {}
+# Store active OAuth states for validation, keyed by state_key() so
+# lookup timing never depends on how much of a guessed state matches.
+# Bounded and expiring so abandoned flows can't accumulate for the
+# lifetime of the process; guarded by a lock since handlers run concurrently.
+active_oauth_flows: TTLCache[bytes, dict] = TTLCache(
+    maxsize=1024,
+    ttl=settings.oauth_timeout_seconds,
+)
+_oauth_flows_lock = asyncio.Lock()
+
+# Invalid-state rejections take at least this long, so response timing
+# doesn't reveal anything about the pending states
+INVALID_STATE_MIN_SECONDS = 0.05
 
 
 @router.post("/authorize/start", response_model=OAuthStartResponse)
@@ -41,17 +54,21 @@ async def start_oauth_flow():
     logger.info("Starting OAuth authorization flow")
     
     try:
-        # Start callback server
-        callback_server.start()
-        
         # Generate authorization URL
-        auth_url, state = oauth_service.generate_authorization_url()
+        auth_url, state, code_verifier = oauth_service.generate_authorization_url()
         
-        # Store state for later validation
-        active_oauth_flows[state] = {
-            "started_at": datetime.now().timestamp(),
-            "completed": False,
-        }
+        # Start callback server (kept up while any flow is pending) and
+        # register this flow's state with it
+        await callback_server.acquire(state)
+        
+        # Store state for later validation, with the PKCE verifier the code
+        # exchange needs (it never leaves the backend)
+        async with _oauth_flows_lock:
+            active_oauth_flows.expire()
+            active_oauth_flows[state_key(state)] = {
+                "started_at": time.time(),
+                "code_verifier": code_verifier,
+            }
         
         return OAuthStartResponse(
             auth_url=auth_url,
@@ -59,14 +76,13 @@ async def start_oauth_flow():
         )
         
     except Exception as e:
-        logger.error(f"Failed to start OAuth flow: {e}", exc_info=True)
+        logger.error("Failed to start OAuth flow: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to start OAuth: {str(e)}")
 
 
 @router.post("/authorize/complete")
 async def complete_oauth_flow(
     state: str,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -81,10 +97,20 @@ async def complete_oauth_flow(
     Raises:
         HTTPException: If flow fails or times out
     """
-    logger.info(f"Completing OAuth flow for state: {state[:10]}...")
+    started = time.perf_counter()
+    logger.info("Completing OAuth flow for state: %s...", state[:10])
     
-    # Validate state
-    if state not in active_oauth_flows:
+    # Validate state - each state can only be completed once, whatever the outcome
+    async with _oauth_flows_lock:
+        flow = active_oauth_flows.pop(state_key(state), None)
+    if flow is None:
+        # The flow's TTL entry may have expired before the callback server's
+        # own expiry fired; don't leave it holding the listener. A flow
+        # already being completed by another request is left alone.
+        await callback_server.release_if_unclaimed(state)
+        
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(max(0.0, INVALID_STATE_MIN_SECONDS - elapsed))
         raise HTTPException(status_code=400, detail="Invalid or expired state")
     
     try:
@@ -95,17 +121,16 @@ async def complete_oauth_flow(
         )
         
         # Exchange code for tokens
-        tokens = await oauth_service.exchange_code_for_tokens(code, state)
+        tokens = await oauth_service.exchange_code_for_tokens(
+            code, state, flow["code_verifier"]
+        )
         
         # Get user email from Google
         email = await oauth_service.get_user_email(tokens.access_token)
         
         # Check if account already exists (SRS FR-3.1.3)
-        existing = await AccountCRUD.exists(db, email)
-        if existing:
-            # Stop callback server
-            background_tasks.add_task(callback_server.stop)
-            
+        existing = await AccountCRUD.get_by_email(db, email)
+        if existing is not None:
             raise HTTPException(
                 status_code=409,
                 detail=f"This account has already been added: {email}"
@@ -116,13 +141,6 @@ async def complete_oauth_flow(
         
         # IMPORTANT: Commit immediately so subsequent requests see the account
         await db.commit()
-        await db.refresh(account)
-        
-        # Mark flow as completed
-        active_oauth_flows[state]["completed"] = True
-        
-        # Schedule callback server stop
-        background_tasks.add_task(callback_server.stop)
         
         # Return account and tokens (tokens will be stored by Electron)
         return {
@@ -130,21 +148,24 @@ async def complete_oauth_flow(
             "tokens": tokens.model_dump(),
         }
         
+    except HTTPException:
+        raise
+        
     except TimeoutError as e:
-        # Stop callback server
-        background_tasks.add_task(callback_server.stop)
         raise HTTPException(status_code=408, detail=str(e))
         
     except ValueError as e:
-        # Stop callback server
-        background_tasks.add_task(callback_server.stop)
         raise HTTPException(status_code=400, detail=str(e))
         
     except Exception as e:
-        # Stop callback server
-        background_tasks.add_task(callback_server.stop)
-        logger.error(f"OAuth flow failed: {e}", exc_info=True)
+        logger.error("OAuth flow failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"OAuth flow failed: {str(e)}")
+        
+    finally:
+        # This flow no longer needs the callback server. Released inline
+        # rather than as a background task, since those don't run when the
+        # endpoint raises.
+        await callback_server.release(state)
 
 
 @router.get("/list", response_model=AccountListResponse)
@@ -157,12 +178,12 @@ async def list_accounts(db: AsyncSession = Depends(get_db)):
     """
     logger.debug("Fetching all accounts")
     
-    accounts = await AccountCRUD.get_all(db)
+    # Rows come straight from our own database, so skip re-validation
+    rows = await AccountCRUD.get_all_rows(db)
+    accounts = [AccountResponse.model_construct(**row) for row in rows]
     
-    return AccountListResponse(
-        accounts=[AccountResponse.model_validate(acc) for acc in accounts],
-        total=len(accounts),
-    )
+    # response_model serializes this straight to JSON bytes in pydantic-core
+    return AccountListResponse.model_construct(accounts=accounts, total=len(accounts))
 
 
 @router.get("/{email}", response_model=AccountResponse)
@@ -179,12 +200,12 @@ async def get_account(email: str, db: AsyncSession = Depends(get_db)):
     Raises:
         HTTPException: If account not found
     """
-    account = await AccountCRUD.get_by_email(db, email)
+    row = await AccountCRUD.get_row_by_email(db, email)
     
-    if not account:
+    if row is None:
         raise HTTPException(status_code=404, detail=f"Account not found: {email}")
     
-    return AccountResponse.model_validate(account)
+    return AccountResponse.model_construct(**row)
 
 
 @router.delete("/{email}", response_model=AccountDeleteResponse)
@@ -202,25 +223,22 @@ async def delete_account(email: str, db: AsyncSession = Depends(get_db)):
     Raises:
         HTTPException: If account not found
     """
-    logger.info(f"Deleting account: {email}")
+    logger.info("Deleting account: %s", email)
+    
+    # Delete from database (rowcount tells us whether it existed)
+    deleted = await AccountCRUD.delete(db, email)
     
-    # Check if exists
-    exists = await AccountCRUD.exists(db, email)
-    if not exists:
+    if not deleted:
         raise HTTPException(status_code=404, detail=f"Account not found: {email}")
     
-    # Delete from database
-    deleted = await AccountCRUD.delete(db, email)
+    await db.commit()
     
-    if deleted:
-        # Note: Electron will also delete tokens from credential manager
-        return AccountDeleteResponse(
-            success=True,
-            email=email,
-            message="Account and all associated data deleted successfully",
-        )
-    else:
-        raise HTTPException(status_code=500, detail="Failed to delete account")
+    # Note: Electron will also delete tokens from credential manager
+    return AccountDeleteResponse(
+        success=True,
+        email=email,
+        message="Account and all associated data deleted successfully",
+    )
 
 
 @router.post("/{email}/refresh-token", response_model=TokenData)
@@ -235,18 +253,18 @@ async def refresh_token(email: str, refresh_token: str):
     Returns:
         New token data
     """
-    logger.info(f"Refreshing token for: {email}")
+    logger.info("Refreshing token for: %s", email)
     
     try:
         new_tokens = await oauth_service.refresh_access_token(refresh_token)
         return new_tokens
         
     except ValueError as e:
-        logger.error(f"Token refresh failed for {email}: {e}")
+        logger.error("Token refresh failed for %s: %s", email, e)
         raise HTTPException(status_code=401, detail=str(e))
 
 
-@router.post("/{email}/realtime/enable")
+@router.post("/{email}/realtime/enable", response_model=AccountResponse)
 async def enable_realtime(email: str, db: AsyncSession = Depends(get_db)):
     """
     Enable real-time monitoring for account
@@ -263,10 +281,12 @@ async def enable_realtime(email: str, db: AsyncSession = Depends(get_db)):
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
+    await db.commit()
+    
     return AccountResponse.model_validate(account)
 
 
-@router.post("/{email}/realtime/disable")
+@router.post("/{email}/realtime/disable", response_model=AccountResponse)
 async def disable_realtime(email: str, db: AsyncSession = Depends(get_db)):
     """
     Disable real-time monitoring for account
@@ -283,5 +303,7 @@ async def disable_realtime(email: str, db: AsyncSession = Depends(get_db)):
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
+    await db.commit()
+    
     return AccountResponse.model_validate(account)
 
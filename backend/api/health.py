@@ -3,12 +3,14 @@ Health Check API Endpoints
 FR-2.1.3: Health endpoint for heartbeat checks
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from datetime import datetime
 import sys
 import platform
 import socket
 import os
+import time
+import orjson
 
 from models.health import HealthResponse, SystemInfo
 from config import settings
@@ -16,6 +18,81 @@ from utils.logger import logger
 
 router = APIRouter()
 
+# How often the pre-serialized health body is rebuilt
+HEALTH_REFRESH_INTERVAL_SECONDS = 1.0
+
+
+def _build_health_body() -> bytes:
+    """Serialize a HealthResponse payload to JSON bytes"""
+    return orjson.dumps({
+        "status": "healthy",
+        "timestamp": datetime.now(),
+        "version": settings.app_version,
+        "message": "Backend is running normally",
+    })
+
+
+# Pre-serialized body served by /health, rebuilt on demand once stale
+_health_body: bytes = _build_health_body()
+_health_body_built_at = time.monotonic()
+
+_PING_BODY = orjson.dumps({"message": "pong"})
+
+
+def _current_health_body() -> bytes:
+    """
+    Get the cached health body, rebuilding it if older than the interval
+    
+    Rebuilt by the heartbeat itself rather than a background task, so an
+    idle backend never wakes up just to refresh it.
+    """
+    global _health_body, _health_body_built_at
+    
+    now = time.monotonic()
+    if now - _health_body_built_at >= HEALTH_REFRESH_INTERVAL_SECONDS:
+        _health_body = _build_health_body()
+        _health_body_built_at = now
+    return _health_body
+
+
+class HealthFastPathMiddleware:
+    """
+    Pure ASGI middleware answering GET /health and GET /ping directly
+    
+    Added as the outermost user middleware so the heartbeat skips CORS,
+    exception handling, routing and dependency resolution. Any other
+    request (including other methods on these paths) is passed through to
+    the regular routes below.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            path = scope["path"]
+            if path == "/health":
+                await self._send_json(send, _current_health_body())
+                return
+            if path == "/ping":
+                await self._send_json(send, _PING_BODY)
+                return
+        
+        await self.app(scope, receive, send)
+    
+    @staticmethod
+    async def _send_json(send, body: bytes) -> None:
+        """Send a complete 200 JSON response"""
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -23,17 +100,13 @@ async def health_check():
     Health check endpoint
     FR-2.1.3: Used by Electron for heartbeat checks every 5 seconds
     
+    Serves a pre-serialized body (at most one second old) so the
+    heartbeat does no model construction or JSON encoding.
+    
     Returns:
         HealthResponse indicating backend is healthy
     """
-    logger.debug("Health check requested")
-    
-    return HealthResponse(
-        status="healthy",
-        timestamp=datetime.now(),
-        version=settings.app_version,
-        message="Backend is running normally"
-    )
+    return Response(content=_current_health_body(), media_type="application/json")
 
 
 @router.get("/health/detailed", response_model=dict)
@@ -70,5 +143,5 @@ async def ping():
     Returns:
         Simple pong response
     """
-    return {"message": "pong"}
+    return Response(content=_PING_BODY, media_type="application/json")
 
@@ -20,6 +20,7 @@ class Settings(BaseSettings):
     host: str = "127.0.0.1"
     port_range_start: int = 50000
     port_range_end: int = 50100
+    use_port_range: bool = False  # Scan the range instead of letting the OS pick
     
     # CORS (only allow localhost)
     cors_origins: list[str] = [
@@ -32,10 +33,12 @@ class Settings(BaseSettings):
     google_client_id: str = ""
     google_client_secret: str = ""
     google_oauth_redirect_uri: str = "http://localhost:8080/callback"
+    oauth_refresh_concurrency: int = 20  # Max token refreshes in flight at once
     
     # OAuth Callback Server
     oauth_callback_port: int = 8080
     oauth_timeout_seconds: int = 300  # 5 minutes
+    oauth_callback_idle_seconds: int = 10  # Keep server up between back-to-back flows
     
     # Gmail API Scopes
     gmail_scopes: list[str] = [
@@ -46,6 +49,11 @@ class Settings(BaseSettings):
     
     # Database
     database_path: str = "data/unsubscriber.db"
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 3600  # seconds
+    db_busy_timeout: int = 30  # seconds SQLite waits on a locked database
     
     # Paths
     base_dir: Path = Path(__file__).parent
@@ -2,14 +2,33 @@
 CRUD operations for database models
 """
 
-from sqlalchemy import select, delete
+from collections.abc import Sequence
+from sqlalchemy import select, insert, delete, exists, update, RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from datetime import datetime
-
 from db.models import Account
 from utils.logger import logger
 
 
+# Columns exposed to the frontend (mirrors models.account.AccountResponse)
+ACCOUNT_RESPONSE_COLUMNS = (
+    Account.id,
+    Account.email,
+    Account.display_name,
+    Account.added_timestamp,
+    Account.last_sync_timestamp,
+    Account.is_realtime_enabled,
+    Account.status,
+    Account.pending_subscriptions_count,
+)
+
+
+def normalize_email(email: str) -> str:
+    """Canonical form used for storing and looking up account emails"""
+    return email.strip().lower()
+
+
 class AccountCRUD:
     """CRUD operations for Account model"""
     
@@ -26,20 +45,23 @@ class AccountCRUD:
         Returns:
             Created account
         """
-        account = Account(
-            email=email,
-            display_name=display_name,
-            added_timestamp=datetime.now(),
-            is_realtime_enabled=False,
-            status="active",
-            pending_subscriptions_count=0,
+        # added_timestamp is filled in by the database; RETURNING hands back
+        # the complete row so no follow-up refresh is needed
+        stmt = (
+            insert(Account)
+            .values(
+                email=normalize_email(email),
+                display_name=display_name,
+                is_realtime_enabled=False,
+                status="active",
+                pending_subscriptions_count=0,
+            )
+            .returning(Account)
         )
+        result = await db.execute(stmt)
+        account = result.scalar_one()
         
-        db.add(account)
-        await db.flush()
-        await db.refresh(account)
-        
-        logger.info(f"Created account: {email}")
+        logger.info("Created account: %s", email)
         return account
     
     @staticmethod
@@ -54,9 +76,25 @@ class AccountCRUD:
         Returns:
             Account if found, None otherwise
         """
-        result = await db.execute(select(Account).where(Account.email == email))
+        result = await db.execute(select(Account).where(Account.email == normalize_email(email)))
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_row_by_email(db: AsyncSession, email: str) -> RowMapping | None:
+        """
+        Get account columns by email without hydrating an ORM object
+        
+        Args:
+            db: Database session
+            email: Account email
+            
+        Returns:
+            Column mapping if found, None otherwise
+        """
+        stmt = select(*ACCOUNT_RESPONSE_COLUMNS).where(Account.email == normalize_email(email))
+        result = await db.execute(stmt)
+        return result.mappings().one_or_none()
+    
     @staticmethod
     async def get_by_id(db: AsyncSession, account_id: int) -> Account | None:
         """
@@ -77,15 +115,67 @@ class AccountCRUD:
         """
         Get all accounts
         
+        Kept for callers that need ORM objects (and, later, their
+        relationships); /accounts/list reads get_all_rows() instead.
+        
         Args:
             db: Database session
             
         Returns:
             List of all accounts
         """
-        result = await db.execute(select(Account).order_by(Account.added_timestamp.desc()))
+        # raiseload("*") makes any relationship access that wasn't loaded up
+        # front fail loudly instead of issuing one lazy SELECT per row (N+1).
+        # When relationships are added, load them here with selectinload().
+        stmt = (
+            select(Account)
+            .options(raiseload("*"))
+            .order_by(Account.added_timestamp.desc(), Account.id.desc())
+        )
+        result = await db.execute(stmt)
         return list(result.scalars().all())
     
+    @staticmethod
+    async def get_all_rows(db: AsyncSession) -> Sequence[RowMapping]:
+        """
+        Get all accounts as column mappings without hydrating ORM objects
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            List of account column mappings
+        """
+        stmt = (
+            select(*ACCOUNT_RESPONSE_COLUMNS)
+            .order_by(Account.added_timestamp.desc(), Account.id.desc())
+        )
+        result = await db.execute(stmt)
+        return result.mappings().all()
+    
+    @staticmethod
+    async def _update_by_email(db: AsyncSession, email: str, **values) -> Account | None:
+        """
+        Apply column updates with a single UPDATE ... RETURNING statement
+        
+        Args:
+            db: Database session
+            email: Account email
+            **values: Column values to set
+            
+        Returns:
+            Updated account or None if not found
+        """
+        stmt = (
+            update(Account)
+            .where(Account.email == normalize_email(email))
+            .values(**values)
+            .returning(Account)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
+    
     @staticmethod
     async def update_status(db: AsyncSession, email: str, status: str) -> Account | None:
         """
@@ -99,12 +189,9 @@ class AccountCRUD:
         Returns:
             Updated account or None if not found
         """
-        account = await AccountCRUD.get_by_email(db, email)
+        account = await AccountCRUD._update_by_email(db, email, status=status)
         if account:
-            account.status = status
-            await db.flush()
-            await db.refresh(account)
-            logger.info(f"Updated account {email} status to: {status}")
+            logger.info("Updated account %s status to: %s", email, status)
         return account
     
     @staticmethod
@@ -119,12 +206,11 @@ class AccountCRUD:
         Returns:
             Updated account or None if not found
         """
-        account = await AccountCRUD.get_by_email(db, email)
+        account = await AccountCRUD._update_by_email(
+            db, email, last_sync_timestamp=datetime.now()
+        )
         if account:
-            account.last_sync_timestamp = datetime.now()
-            await db.flush()
-            await db.refresh(account)
-            logger.debug(f"Updated last sync for: {email}")
+            logger.debug("Updated last sync for: %s", email)
         return account
     
     @staticmethod
@@ -140,17 +226,15 @@ class AccountCRUD:
         Returns:
             Updated account or None if not found
         """
-        account = await AccountCRUD.get_by_email(db, email)
+        values = {"is_realtime_enabled": enabled}
+        
+        # SRS FR-5.1.2: Disabling clears pending subscriptions
+        if not enabled:
+            values["pending_subscriptions_count"] = 0
+        
+        account = await AccountCRUD._update_by_email(db, email, **values)
         if account:
-            account.is_realtime_enabled = enabled
-            
-            # SRS FR-5.1.2: Disabling clears pending subscriptions
-            if not enabled:
-                account.pending_subscriptions_count = 0
-            
-            await db.flush()
-            await db.refresh(account)
-            logger.info(f"Set realtime_enabled={enabled} for: {email}")
+            logger.info("Set realtime_enabled=%s for: %s", enabled, email)
         return account
     
     @staticmethod
@@ -166,12 +250,9 @@ class AccountCRUD:
         Returns:
             Updated account or None if not found
         """
-        account = await AccountCRUD.get_by_email(db, email)
-        if account:
-            account.pending_subscriptions_count = count
-            await db.flush()
-            await db.refresh(account)
-        return account
+        return await AccountCRUD._update_by_email(
+            db, email, pending_subscriptions_count=count
+        )
     
     @staticmethod
     async def delete(db: AsyncSession, email: str) -> bool:
@@ -185,13 +266,13 @@ class AccountCRUD:
         Returns:
             True if deleted, False if not found
         """
-        result = await db.execute(delete(Account).where(Account.email == email))
+        result = await db.execute(delete(Account).where(Account.email == normalize_email(email)))
         deleted = result.rowcount > 0
         
         if deleted:
-            logger.info(f"Deleted account: {email}")
+            logger.info("Deleted account: %s", email)
         else:
-            logger.warn(f"Account not found for deletion: {email}")
+            logger.warning("Account not found for deletion: %s", email)
         
         return deleted
     
@@ -207,6 +288,20 @@ class AccountCRUD:
         Returns:
             True if exists, False otherwise
         """
-        account = await AccountCRUD.get_by_email(db, email)
-        return account is not None
+        return await AccountCRUD.exists_scalar(db, email)
+    
+    @staticmethod
+    async def exists_scalar(db: AsyncSession, email: str) -> bool:
+        """
+        Check if account exists without hydrating the full row
+        
+        Args:
+            db: Database session
+            email: Account email
+            
+        Returns:
+            True if exists, False otherwise
+        """
+        result = await db.execute(select(exists().where(Account.email == normalize_email(email))))
+        return bool(result.scalar())
 
@@ -2,6 +2,7 @@
 Database connection and session management
 """
 
+from sqlalchemy import event, Connection
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from config import settings
@@ -17,31 +18,137 @@ class Base(DeclarativeBase):
 engine = create_async_engine(
     settings.get_database_url(),
     echo=settings.debug,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_pre_ping=True,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args={"check_same_thread": False, "timeout": settings.db_busy_timeout},
     future=True,
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection for concurrent readers/writers"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 # Create session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
+    autoflush=False,  # CRUD helpers write with explicit statements/flushes
 )
 
 
+# Columns carried over when the accounts table is rebuilt
+_ACCOUNT_COLUMNS = (
+    "id, email, display_name, added_timestamp, last_sync_timestamp, "
+    "is_realtime_enabled, status, pending_subscriptions_count"
+)
+
+
+def _accounts_table_outdated(conn: Connection) -> bool:
+    """Check whether an existing accounts table predates the current schema"""
+    table_sql = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'accounts'"
+    ).scalar()
+    if table_sql is None:
+        return False  # No table yet; create_all builds it
+    
+    columns = {row[1]: row for row in conn.exec_driver_sql("PRAGMA table_info(accounts)")}
+    
+    # Older releases filled added_timestamp from Python, without a column
+    # default, and compared emails case-sensitively
+    return columns["added_timestamp"][4] is None or "NOCASE" not in table_sql.upper()
+
+
+def _migrate_accounts_table(conn: Connection) -> None:
+    """
+    Rebuild an accounts table created by an older release
+    
+    create_all() never alters an existing table, and SQLite can't change a
+    column definition in place, so the table is recreated from the current
+    model and the rows are copied across.
+    """
+    if not _accounts_table_outdated(conn):
+        return
+    
+    logger.info("Migrating accounts table to the current schema")
+    
+    conn.exec_driver_sql("ALTER TABLE accounts RENAME TO accounts_old")
+    
+    # Named indexes move with the renamed table; drop them so the new table
+    # can be created with the same index names
+    index_names = conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = 'accounts_old' AND sql IS NOT NULL"
+    ).scalars().all()
+    for name in index_names:
+        conn.exec_driver_sql(f'DROP INDEX "{name}"')
+    
+    Base.metadata.tables["accounts"].create(conn)
+    
+    # Keep each email's stored spelling: Electron keys the account's tokens
+    # by it, and the NOCASE column already matches normalized lookups.
+    # Addresses differing only in case are the same account; the earliest
+    # row is kept.
+    result = conn.exec_driver_sql(
+        f"INSERT OR IGNORE INTO accounts ({_ACCOUNT_COLUMNS}) "
+        "SELECT id, trim(email), display_name, added_timestamp, "
+        "last_sync_timestamp, is_realtime_enabled, status, pending_subscriptions_count "
+        "FROM accounts_old ORDER BY id"
+    )
+    old_count = conn.exec_driver_sql("SELECT count(*) FROM accounts_old").scalar()
+    if result.rowcount < old_count:
+        logger.warning(
+            "Dropped %s duplicate account(s) differing only in email case",
+            old_count - result.rowcount,
+        )
+    
+    conn.exec_driver_sql("DROP TABLE accounts_old")
+
+
+def prepare_schema(conn: Connection) -> None:
+    """
+    Create missing tables and upgrade those left by older releases
+    
+    Args:
+        conn: Synchronous connection (run via AsyncConnection.run_sync)
+    """
+    _migrate_accounts_table(conn)
+    Base.metadata.create_all(conn)
+
+
 async def init_db():
     """Initialize database tables"""
     logger.info("Initializing database")
     
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(prepare_schema)
     
     logger.info("Database initialized successfully")
 
 
+async def close_db():
+    """Close all pooled database connections"""
+    await engine.dispose()
+    logger.info("Database connections closed")
+
+
 async def get_db() -> AsyncSession:
     """
     Dependency for getting database session
     
+    Write endpoints must commit explicitly; read-only requests never issue
+    a COMMIT (each one forces a WAL sync on SQLite).
+    
     Usage in FastAPI:
         @app.get("/something")
         async def route(db: AsyncSession = Depends(get_db)):
@@ -50,7 +157,6 @@ async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
         except Exception:
             await session.rollback()
             raise
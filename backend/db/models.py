@@ -3,11 +3,16 @@ Database models
 """
 
 from datetime import datetime
-from sqlalchemy import String, Boolean, DateTime, Integer
+from sqlalchemy import String, Boolean, DateTime, Integer, text
 from sqlalchemy.orm import Mapped, mapped_column
 from db.database import Base
 
 
+# SQLite's CURRENT_TIMESTAMP is UTC; keep stored timestamps in local time
+# (with milliseconds) to match the naive datetime.now() values used elsewhere
+LOCAL_NOW = text("(strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))")
+
+
 class Account(Base):
     """
     Gmail account model
@@ -18,11 +23,14 @@ class Account(Base):
     __tablename__ = "accounts"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
+    # Gmail addresses are case-insensitive
+    email: Mapped[str] = mapped_column(
+        String(255, collation="NOCASE"), unique=True, nullable=False, index=True
+    )
     display_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     
     # Timestamps
-    added_timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    added_timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=LOCAL_NOW)
     last_sync_timestamp: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     
     # Settings
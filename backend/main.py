@@ -4,17 +4,19 @@ FR-2.1.2: Embedded Python backend
 FR-2.1.4: Dynamic port allocation and announcement
 """
 
+import sys
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from config import settings
-from utils.logger import logger
+from utils.logger import logger, configure_logging
 from utils.port_finder import PortFinder
-from api.health import router as health_router
+from api.health import router as health_router, HealthFastPathMiddleware
 from api.accounts import router as accounts_router
-from db.database import init_db
+from db.database import init_db, close_db
+from services.oauth_service import oauth_service
 
 
 # ============================================================================
@@ -28,16 +30,21 @@ async def lifespan(app: FastAPI):
     Replaces deprecated @app.on_event
     """
     # Startup
-    logger.info(f"{settings.app_name} v{settings.app_version} starting up")
-    logger.info(f"Debug mode: {settings.debug}")
+    logger.info("%s v%s starting up", settings.app_name, settings.app_version)
+    logger.info("Debug mode: %s", settings.debug)
+    logger.info("OAuth client_id: %s...", settings.google_client_id[:20])
     
-    # Initialize database
+    # Initialize database - this also leaves an open connection in the
+    # pool, so the first request doesn't pay for the SQLite handshake
     await init_db()
     
     yield
     
     # Shutdown
     logger.info("Backend shutting down")
+    
+    await oauth_service.aclose()
+    await close_db()
 
 
 def create_app() -> FastAPI:
@@ -66,6 +73,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Heartbeat endpoints bypass the rest of the stack (added last = outermost)
+    app.add_middleware(HealthFastPathMiddleware)
+    
     # Register routers
     app.include_router(health_router, tags=["Health"])
     app.include_router(accounts_router, prefix="/accounts", tags=["Accounts"])
@@ -82,13 +92,16 @@ def main():
     Main entry point for the backend
     FR-2.1.4: Find available port and announce it to Electron
     """
+    configure_logging()
+    
     logger.info("=" * 60)
-    logger.info(f"{settings.app_name} v{settings.app_version}")
+    logger.info("%s v%s", settings.app_name, settings.app_version)
     logger.info("=" * 60)
     
     try:
-        # FR-2.1.4: Find an available port
-        port = PortFinder.find_available_port()
+        # FR-2.1.4: Reserve an available port; uvicorn serves on this socket
+        sock = PortFinder.reserve_port()
+        port = sock.getsockname()[1]
         
         # Create the FastAPI app
         app = create_app()
@@ -103,16 +116,18 @@ def main():
             port=port,
             log_level="info" if settings.debug else "warning",
             access_log=settings.debug,
-            loop="asyncio",
+            # uvloop isn't available on Windows
+            loop="asyncio" if sys.platform == "win32" else "uvloop",
+            http="httptools",
         )
         
         server = uvicorn.Server(config)
         
-        logger.info(f"Starting server on {settings.host}:{port}")
-        server.run()
+        logger.info("Starting server on %s:%s", settings.host, port)
+        server.run(sockets=[sock])
         
     except Exception as e:
-        logger.error(f"Failed to start backend: {e}", exc_info=True)
+        logger.error("Failed to start backend: %s", e, exc_info=True)
         raise
 
 
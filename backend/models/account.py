@@ -2,7 +2,7 @@
 Pydantic models for account operations
 """
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from datetime import datetime
 
 
@@ -10,6 +10,8 @@ class OAuthStartResponse(BaseModel):
     """Response when starting OAuth flow"""
     auth_url: str
     state: str  # Random state for CSRF protection
+    
+    model_config = ConfigDict(frozen=True)
 
 
 class OAuthCallbackRequest(BaseModel):
@@ -25,6 +27,8 @@ class TokenData(BaseModel):
     expires_at: int  # Unix timestamp
     scope: str
     token_type: str = "Bearer"
+    
+    model_config = ConfigDict(frozen=True)
 
 
 class AccountCreate(BaseModel):
@@ -45,15 +49,15 @@ class AccountResponse(BaseModel):
     status: str
     pending_subscriptions_count: int
     
-    model_config = {
-        "from_attributes": True,
-    }
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class AccountListResponse(BaseModel):
     """List of accounts"""
     accounts: list[AccountResponse]
     total: int
+    
+    model_config = ConfigDict(frozen=True)
 
 
 class AccountDeleteResponse(BaseModel):
@@ -61,4 +65,6 @@ class AccountDeleteResponse(BaseModel):
     success: bool
     email: str
     message: str
+    
+    model_config = ConfigDict(frozen=True)
 
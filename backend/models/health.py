@@ -2,7 +2,7 @@
 Health Check Models
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
 
@@ -13,15 +13,17 @@ class HealthResponse(BaseModel):
     version: str
     message: str
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "status": "healthy",
                 "timestamp": "2025-10-21T12:00:00",
                 "version": "1.0.0",
                 "message": "Backend is running normally"
             }
-        }
+        },
+    )
 
 
 class SystemInfo(BaseModel):
@@ -30,4 +32,6 @@ class SystemInfo(BaseModel):
     platform: str
     hostname: str
     process_id: int
+    
+    model_config = ConfigDict(frozen=True)
 
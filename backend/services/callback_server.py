@@ -4,174 +4,314 @@ Runs only during OAuth flow to capture authorization code
 """
 
 import asyncio
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
-from threading import Thread
-import time
+import hashlib
+from urllib.parse import urlsplit, parse_qs
 
 from config import settings
 from utils.logger import logger
+from utils.port_finder import PortFinder
 
 
-class CallbackHandler(BaseHTTPRequestHandler):
-    """HTTP request handler for OAuth callback"""
+# Callback pages, rendered once at import (messages are fixed). Success and
+# failure pages differ only in the slots below.
+_PAGE_TEMPLATE = """\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>{title}</title>
+    <style>
+        body {{
+            font-family: Arial, sans-serif;
+            display: flex;
+            justify-content: center;
+            align-items: center;
+            height: 100vh;
+            margin: 0;
+            background: linear-gradient(135deg, {gradient});
+        }}
+        .container {{
+            background: white;
+            padding: 40px;
+            border-radius: 10px;
+            box-shadow: 0 10px 40px rgba(0,0,0,0.2);
+            text-align: center;
+        }}
+        h1 {{ color: {color}; margin-bottom: 20px; }}
+        p {{ color: #666; font-size: 16px; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>{icon} {message}</h1>
+        <p>{hint}</p>
+    </div>
+</body>
+</html>
+"""
+
+
+def _render_page(success: bool, message: str) -> bytes:
+    """Render the callback page template to bytes"""
+    if success:
+        slots = {
+            "title": "Authorization Successful",
+            "gradient": "#667eea 0%, #764ba2 100%",
+            "color": "#28a745",
+            "icon": "✓",
+            "hint": "You may now close this window.",
+        }
+    else:
+        slots = {
+            "title": "Authorization Failed",
+            "gradient": "#f093fb 0%, #f5576c 100%",
+            "color": "#dc3545",
+            "icon": "✗",
+            "hint": "Please try again.",
+        }
+    return _PAGE_TEMPLATE.format(message=message, **slots).encode()
+
+
+_SUCCESS_PAGE = _render_page(True, "Success! You can close this window and return to Unsubscriber.")
+_DENIED_PAGE = _render_page(True, "Authorization denied. You can close this window.")
+_INVALID_PAGE = _render_page(False, "Invalid callback parameters")
+
+
+def _http_response(status: str, body: bytes) -> bytes:
+    """Build a complete HTTP/1.1 response around one of the pages"""
+    head = (
+        f"HTTP/1.1 {status}\r\n"
+        "Content-Type: text/html; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n"
+        "\r\n"
+    )
+    return head.encode() + body
+
+
+_SUCCESS_RESPONSE = _http_response("200 OK", _SUCCESS_PAGE)
+_DENIED_RESPONSE = _http_response("200 OK", _DENIED_PAGE)
+_INVALID_RESPONSE = _http_response("400 Bad Request", _INVALID_PAGE)
+
+# Upper bound on the request head we are willing to buffer
+MAX_REQUEST_HEAD_BYTES = 16 * 1024
+
+# How long a connection may take to send its request head. Browsers open
+# speculative connections that never send anything; those must not keep
+# the server (and its shutdown) waiting.
+REQUEST_READ_TIMEOUT_SECONDS = 5.0
+
+
+def state_key(state: str) -> bytes:
+    """
+    Get the lookup key for an OAuth state token
     
-    # Class variable to store received code
-    received_code: str | None = None
-    received_state: str | None = None
-    received_error: str | None = None
+    States are looked up by SHA-256 digest so lookup timing never depends
+    on how much of a guessed state matches.
+    """
+    return hashlib.sha256(state.encode()).digest()
+
+
+class OAuthCallbackServer:
+    """Temporary server to capture OAuth callback"""
     
-    def do_GET(self):
-        """Handle GET request from OAuth redirect"""
-        # Parse URL
-        parsed_path = urlparse(self.path)
-        params = parse_qs(parsed_path.query)
-        
-        # Check for error
-        if 'error' in params:
-            CallbackHandler.received_error = params['error'][0]
-            self.send_success_response("Authorization denied. You can close this window.")
-            logger.warn(f"OAuth error received: {CallbackHandler.received_error}")
-            return
+    def __init__(self):
+        self.server: asyncio.Server | None = None
+        self.is_running = False
+        
+        # One future per pending flow, keyed by state_key(state) and
+        # resolved by the connection handler when that flow's callback arrives
+        self._pending: dict[bytes, asyncio.Future] = {}
+        
+        # Releases flows nobody has started waiting on yet, so abandoned
+        # sign-ins can't keep the server (and their futures) alive forever
+        self._expiry_timers: dict[bytes, asyncio.TimerHandle] = {}
         
-        # Extract code and state
-        code = params.get('code', [None])[0]
-        state = params.get('state', [None])[0]
-        
-        if code and state:
-            CallbackHandler.received_code = code
-            CallbackHandler.received_state = state
-            self.send_success_response("Success! You can close this window and return to Unsubscriber.")
-            logger.info("OAuth callback received successfully")
-        else:
-            CallbackHandler.received_error = "Missing code or state parameter"
-            self.send_error_response("Invalid callback parameters")
-            logger.error("OAuth callback missing required parameters")
+        # Open client connections, closed on stop() so shutdown never waits on them
+        self._connections: set[asyncio.StreamWriter] = set()
+        
+        self._idle_stop_task: asyncio.Task | None = None
+        self._lifecycle_lock = asyncio.Lock()
+    
+    def _resolve(self, state: str, code: str | None, error: str | None) -> None:
+        """Resolve the pending future of the flow that issued this state"""
+        future = self._pending.get(state_key(state))
+        if future is not None and not future.done():
+            future.set_result((code, error))
     
-    def send_success_response(self, message: str):
-        """Send HTML success response"""
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Authorization Successful</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    height: 100vh;
-                    margin: 0;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                }}
-                .container {{
-                    background: white;
-                    padding: 40px;
-                    border-radius: 10px;
-                    box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-                    text-align: center;
-                }}
-                h1 {{ color: #28a745; margin-bottom: 20px; }}
-                p {{ color: #666; font-size: 16px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>✓ {message}</h1>
-                <p>You may now close this window.</p>
-            </div>
-        </body>
-        </html>
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
         """
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode())
+        Handle one connection from the OAuth redirect
+        
+        Only the query string of the request line matters, so the request
+        head is read in full but nothing past the first line is parsed.
+        """
+        self._connections.add(writer)
+        try:
+            try:
+                head = await asyncio.wait_for(
+                    reader.readuntil(b"\r\n\r\n"),
+                    timeout=REQUEST_READ_TIMEOUT_SECONDS,
+                )
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                return
+            
+            # "GET /callback?code=...&state=... HTTP/1.1"
+            request_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+            parts = request_line.split(" ")
+            if len(parts) != 3 or parts[0] != "GET":
+                writer.write(_INVALID_RESPONSE)
+                return
+            
+            params = parse_qs(urlsplit(parts[1]).query)
+            
+            code = params.get('code', [None])[0]
+            state = params.get('state', [None])[0]
+            
+            # Only a state issued to a pending flow may resolve anything, so a
+            # stray or forged callback can't complete someone else's sign-in
+            if not state or state_key(state) not in self._pending:
+                writer.write(_INVALID_RESPONSE)
+                logger.error("OAuth callback rejected: unknown or missing state")
+                return
+            
+            # Check for error
+            if 'error' in params:
+                error = params['error'][0]
+                writer.write(_DENIED_RESPONSE)
+                logger.warning("OAuth error received: %s", error)
+                self._resolve(state, None, error)
+            elif code:
+                writer.write(_SUCCESS_RESPONSE)
+                logger.info("OAuth callback received successfully")
+                self._resolve(state, code, None)
+            else:
+                writer.write(_INVALID_RESPONSE)
+                logger.error("OAuth callback missing required parameters")
+                self._resolve(state, None, "Missing code parameter")
+        
+        finally:
+            self._connections.discard(writer)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
     
-    def send_error_response(self, message: str):
-        """Send HTML error response"""
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Authorization Failed</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    height: 100vh;
-                    margin: 0;
-                    background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-                }}
-                .container {{
-                    background: white;
-                    padding: 40px;
-                    border-radius: 10px;
-                    box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-                    text-align: center;
-                }}
-                h1 {{ color: #dc3545; margin-bottom: 20px; }}
-                p {{ color: #666; font-size: 16px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>✗ {message}</h1>
-                <p>Please try again.</p>
-            </div>
-        </body>
-        </html>
+    async def acquire(self, state: str) -> None:
         """
-        self.send_response(400)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode())
+        Register a pending OAuth flow, starting the server if needed
+        
+        Every acquire() must be paired with a release() once the flow ends.
+        A flow that never reaches wait_for_callback() is released
+        automatically after settings.oauth_timeout_seconds.
+        
+        Args:
+            state: State token the flow's callback must carry
+        """
+        async with self._lifecycle_lock:
+            if self._idle_stop_task:
+                self._idle_stop_task.cancel()
+                self._idle_stop_task = None
+            
+            if not self.is_running:
+                await self.start()
+            
+            key = state_key(state)
+            loop = asyncio.get_running_loop()
+            self._pending[key] = loop.create_future()
+            self._expiry_timers[key] = loop.call_later(
+                settings.oauth_timeout_seconds,
+                self._release_if_unclaimed,
+                key,
+            )
     
-    def log_message(self, format: str, *args):
-        """Override to use our logger instead of printing to stderr"""
-        logger.debug(f"Callback server: {format % args}")
-
-
-class OAuthCallbackServer:
-    """Temporary server to capture OAuth callback"""
+    async def release(self, state: str) -> None:
+        """
+        Unregister a finished OAuth flow
+        
+        The server is stopped once no flows are pending, after a short idle
+        grace period so back-to-back sign-ins reuse the same listener.
+        Releasing a state that isn't pending does nothing.
+        
+        Args:
+            state: State token the flow was acquired with
+        """
+        self._release(state_key(state))
     
-    def __init__(self):
-        self.server: HTTPServer | None = None
-        self.thread: Thread | None = None
-        self.is_running = False
+    async def release_if_unclaimed(self, state: str) -> None:
+        """
+        Release a pending flow unless a caller is already waiting on it
+        
+        Used for flows that were started but never completed; a flow being
+        waited on is released by its waiter instead.
+        
+        Args:
+            state: State token the flow was acquired with
+        """
+        self._release_if_unclaimed(state_key(state))
     
-    def start(self) -> None:
-        """Start the callback server"""
-        if self.is_running:
-            logger.warn("Callback server is already running")
+    def _release_if_unclaimed(self, key: bytes) -> None:
+        """Release the flow if wait_for_callback() hasn't claimed it"""
+        if key in self._expiry_timers:
+            self._release(key)
+    
+    def _release(self, key: bytes) -> None:
+        """Drop a pending flow and schedule the idle stop once none remain"""
+        if self._pending.pop(key, None) is None:
             return
         
-        # Reset class variables
-        CallbackHandler.received_code = None
-        CallbackHandler.received_state = None
-        CallbackHandler.received_error = None
+        timer = self._expiry_timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        
+        if not self._pending and self.is_running and self._idle_stop_task is None:
+            self._idle_stop_task = asyncio.create_task(self._stop_when_idle())
+    
+    async def _stop_when_idle(self) -> None:
+        """Stop the server if no flow has acquired it during the grace period"""
+        await asyncio.sleep(settings.oauth_callback_idle_seconds)
+        
+        # Past this point acquire() must not cancel us mid-shutdown
+        self._idle_stop_task = None
         
-        # Create server
-        self.server = HTTPServer(('localhost', settings.oauth_callback_port), CallbackHandler)
+        async with self._lifecycle_lock:
+            if not self._pending:
+                await self.stop()
+    
+    async def start(self) -> None:
+        """Start the callback server"""
+        if self.is_running:
+            logger.warning("Callback server is already running")
+            return
         
-        # Run in separate thread so it doesn't block
-        self.thread = Thread(target=self.server.serve_forever, daemon=True)
-        self.thread.start()
+        # Serve on the event loop from a socket bound by PortFinder
+        sock = PortFinder.bind_port(settings.oauth_callback_port)
+        self.server = await asyncio.start_server(
+            self._handle,
+            sock=sock,
+            limit=MAX_REQUEST_HEAD_BYTES,
+        )
         
         self.is_running = True
-        logger.info(f"OAuth callback server started on port {settings.oauth_callback_port}")
+        logger.info("OAuth callback server started on port %s", settings.oauth_callback_port)
     
-    def stop(self) -> None:
+    async def stop(self) -> None:
         """Stop the callback server"""
         if not self.is_running:
             return
         
         if self.server:
-            self.server.shutdown()
-            self.server.server_close()
+            self.server.close()
+            
+            # Since Python 3.12 wait_closed() also waits for client
+            # connections, so drop any that are still open
+            for writer in list(self._connections):
+                writer.close()
+            if hasattr(self.server, "close_clients"):
+                self.server.close_clients()  # Python 3.13+
+            
+            await self.server.wait_closed()
+            self.server = None
         
         self.is_running = False
         logger.info("OAuth callback server stopped")
@@ -180,8 +320,12 @@ class OAuthCallbackServer:
         """
         Wait for OAuth callback with authorization code
         
+        Only a callback carrying this flow's state can resolve the wait;
+        callbacks with any other state are rejected by the server. The
+        caller must release() the flow afterwards.
+        
         Args:
-            expected_state: Expected state value for CSRF protection
+            expected_state: State token the flow was acquired with
             timeout_seconds: Maximum time to wait (default 5 minutes per SRS)
             
         Returns:
@@ -189,36 +333,32 @@ class OAuthCallbackServer:
             
         Raises:
             TimeoutError: If callback not received within timeout
-            ValueError: If error received or state mismatch
+            ValueError: If error received
+            RuntimeError: If no flow was acquired with this state
         """
-        logger.info(f"Waiting for OAuth callback (timeout: {timeout_seconds}s)")
-        
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout_seconds:
-            # Check if code received
-            if CallbackHandler.received_code and CallbackHandler.received_state:
-                code = CallbackHandler.received_code
-                state = CallbackHandler.received_state
-                
-                # Verify state matches (CSRF protection)
-                if state != expected_state:
-                    raise ValueError("State mismatch - possible CSRF attack")
-                
-                logger.info("OAuth callback received and validated")
-                return code, state
-            
-            # Check if error received
-            if CallbackHandler.received_error:
-                error = CallbackHandler.received_error
-                raise ValueError(f"OAuth error: {error}")
-            
-            # Wait a bit before checking again
-            await asyncio.sleep(0.5)
+        logger.info("Waiting for OAuth callback (timeout: %ss)", timeout_seconds)
+        
+        key = state_key(expected_state)
+        future = self._pending.get(key)
+        if future is None:
+            raise RuntimeError("No OAuth flow is pending for this state")
+        
+        # The flow is claimed now; its caller releases it once done
+        timer = self._expiry_timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        
+        try:
+            code, error = await asyncio.wait_for(future, timeout=timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.error("OAuth callback timeout after %s seconds", timeout_seconds)
+            raise TimeoutError(f"OAuth callback not received within {timeout_seconds} seconds")
+        
+        if error:
+            raise ValueError(f"OAuth error: {error}")
         
-        # Timeout
-        logger.error(f"OAuth callback timeout after {timeout_seconds} seconds")
-        raise TimeoutError(f"OAuth callback not received within {timeout_seconds} seconds")
+        logger.info("OAuth callback received and validated")
+        return code, expected_state
 
 
 # Global instance
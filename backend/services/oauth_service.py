@@ -5,19 +5,25 @@ Handles OAuth flow, token exchange, and token refresh
 
 import secrets
 import asyncio
-from datetime import datetime, timedelta
+import time
+import base64
+import hashlib
 from typing import Optional
-from urllib.parse import urlencode
+from urllib.parse import quote, urlencode
 import httpx
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+import orjson
 
 from config import settings
 from utils.logger import logger
 from models.account import TokenData
 
 
+AUTH_URI = "https://accounts.google.com/o/oauth2/auth"
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+GMAIL_PROFILE_URL = "https://gmail.googleapis.com/gmail/v1/users/me/profile"
+TOKENINFO_URL = "https://oauth2.googleapis.com/tokeninfo"
+
+
 class OAuthService:
     """Google OAuth 2.0 service"""
     
@@ -25,60 +31,120 @@ class OAuthService:
         # Validate configuration
         if not settings.google_client_id or not settings.google_client_secret:
             logger.error("Google OAuth credentials not configured!")
-            logger.error(f"Client ID: {'SET' if settings.google_client_id else 'MISSING'}")
-            logger.error(f"Client Secret: {'SET' if settings.google_client_secret else 'MISSING'}")
+            logger.error("Client ID: %s", 'SET' if settings.google_client_id else 'MISSING')
+            logger.error("Client Secret: %s", 'SET' if settings.google_client_secret else 'MISSING')
             raise ValueError("Google OAuth credentials not configured. Please check backend/.env file")
         
-        logger.info(f"OAuth service initialized with client_id: {settings.google_client_id[:20]}...")
-        
         self.active_states: dict[str, asyncio.Future] = {}
-        self.client_config = {
-            "installed": {
-                "client_id": settings.google_client_id,
-                "client_secret": settings.google_client_secret,
-                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "token_uri": "https://oauth2.googleapis.com/token",
-                "redirect_uris": [settings.google_oauth_redirect_uri],
-            }
+        
+        # Static parts of every token endpoint request
+        self._redirect_uri = settings.google_oauth_redirect_uri
+        self._token_post_base = {
+            "client_id": settings.google_client_id,
+            "client_secret": settings.google_client_secret,
         }
+        
+        # Everything but the state is fixed, so the query string is encoded once
+        self._auth_url_prefix = AUTH_URI + "?" + urlencode(
+            {
+                "client_id": settings.google_client_id,
+                "redirect_uri": self._redirect_uri,
+                "response_type": "code",
+                "scope": " ".join(settings.gmail_scopes),
+                "access_type": "offline",  # Request refresh token
+                "include_granted_scopes": "true",
+                "prompt": "consent",  # Always show consent screen to ensure refresh token
+            },
+            quote_via=quote,
+        ) + "&state="
+        
+        # Caps concurrent token refreshes so batches stay under Google's rate limits
+        self._refresh_sem = asyncio.Semaphore(settings.oauth_refresh_concurrency)
+        
+        # Shared HTTP client, created lazily on first use (needs a running loop)
+        self._http: httpx.AsyncClient | None = None
+    
+    def _http_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared HTTP client
+        
+        Reusing one client keeps connections (and TLS sessions) to Google's
+        endpoints alive across token operations.
+        """
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0),
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20),
+            )
+        return self._http
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
-    def generate_authorization_url(self) -> tuple[str, str]:
+    def generate_authorization_url(self) -> tuple[str, str, str]:
         """
         Generate OAuth authorization URL
         
         Returns:
-            Tuple of (auth_url, state)
-            state is used for CSRF protection
+            Tuple of (auth_url, state, code_verifier)
+            state is used for CSRF protection; code_verifier is the PKCE
+            secret that must be sent with this flow's code exchange
         """
         # Generate random state for CSRF protection
         state = secrets.token_urlsafe(32)
         
-        # Create OAuth flow
-        flow = Flow.from_client_config(
-            self.client_config,
-            scopes=settings.gmail_scopes,
-            redirect_uri=settings.google_oauth_redirect_uri,
-        )
+        # PKCE (RFC 7636): a fresh verifier per flow, sent to Google only as
+        # its S256 challenge, so an intercepted code can't be redeemed
+        code_verifier = secrets.token_urlsafe(64)
+        code_challenge = base64.urlsafe_b64encode(
+            hashlib.sha256(code_verifier.encode("ascii")).digest()
+        ).rstrip(b"=").decode("ascii")
         
         # Generate authorization URL
-        auth_url, _ = flow.authorization_url(
-            access_type='offline',  # Request refresh token
-            include_granted_scopes='true',
-            prompt='consent',  # Always show consent screen to ensure refresh token
-            state=state,
+        auth_url = (
+            self._auth_url_prefix + quote(state)
+            + "&code_challenge=" + code_challenge
+            + "&code_challenge_method=S256"
         )
         
-        logger.info(f"Generated OAuth URL with state: {state[:10]}...")
+        logger.info("Generated OAuth URL with state: %s...", state[:10])
+        
+        return auth_url, state, code_verifier
+    
+    @staticmethod
+    def _parse_token_response(content: bytes, refresh_token: str = '') -> TokenData:
+        """
+        Build TokenData from a token endpoint response body
+        
+        Args:
+            content: Raw JSON body
+            refresh_token: Refresh token to keep if the response has none
+            
+        Returns:
+            TokenData with an absolute expiry timestamp
+        """
+        data = orjson.loads(content)
         
-        return auth_url, state
+        return TokenData(
+            access_token=data['access_token'],
+            refresh_token=data.get('refresh_token') or refresh_token,
+            expires_at=int(time.time()) + int(data.get('expires_in', 3600)),
+            scope=data.get('scope', ''),
+            token_type=data.get('token_type', 'Bearer'),
+        )
     
-    async def exchange_code_for_tokens(self, code: str, state: str) -> TokenData:
+    async def exchange_code_for_tokens(self, code: str, state: str, code_verifier: str) -> TokenData:
         """
         Exchange authorization code for access and refresh tokens
         
         Args:
             code: Authorization code from OAuth callback
             state: State parameter for verification
+            code_verifier: PKCE verifier from generate_authorization_url
             
         Returns:
             TokenData with tokens
@@ -90,41 +156,29 @@ class OAuthService:
         
         try:
             # Manual token exchange to avoid strict scope validation
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://oauth2.googleapis.com/token",
-                    data={
-                        "code": code,
-                        "client_id": settings.google_client_id,
-                        "client_secret": settings.google_client_secret,
-                        "redirect_uri": settings.google_oauth_redirect_uri,
-                        "grant_type": "authorization_code",
-                    },
-                    timeout=10.0,
-                )
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                # Calculate expiry timestamp
-                expires_in = data.get('expires_in', 3600)
-                expires_at = int((datetime.now() + timedelta(seconds=expires_in)).timestamp())
-                
-                token_data = TokenData(
-                    access_token=data['access_token'],
-                    refresh_token=data.get('refresh_token', ''),
-                    expires_at=expires_at,
-                    scope=data.get('scope', ''),
-                    token_type=data.get('token_type', 'Bearer'),
-                )
-                
-                logger.info("Successfully exchanged code for tokens")
-                logger.info(f"Granted scopes: {token_data.scope}")
-                
-                return token_data
+            client = self._http_client()
+            response = await client.post(
+                TOKEN_URI,
+                data={
+                    **self._token_post_base,
+                    "code": code,
+                    "redirect_uri": self._redirect_uri,
+                    "grant_type": "authorization_code",
+                    "code_verifier": code_verifier,
+                },
+                timeout=10.0,
+            )
+            
+            response.raise_for_status()
+            token_data = self._parse_token_response(response.content)
+            
+            logger.info("Successfully exchanged code for tokens")
+            logger.info("Granted scopes: %s", token_data.scope)
+            
+            return token_data
             
         except Exception as e:
-            logger.error(f"Failed to exchange code for tokens: {e}", exc_info=True)
+            logger.error("Failed to exchange code for tokens: %s", e, exc_info=True)
             raise ValueError(f"Token exchange failed: {str(e)}")
     
     async def refresh_access_token(self, refresh_token: str) -> TokenData:
@@ -143,39 +197,52 @@ class OAuthService:
         logger.info("Refreshing access token")
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://oauth2.googleapis.com/token",
-                    data={
-                        "client_id": settings.google_client_id,
-                        "client_secret": settings.google_client_secret,
-                        "refresh_token": refresh_token,
-                        "grant_type": "refresh_token",
-                    },
-                    timeout=10.0,
-                )
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                # Calculate new expiry
-                expires_at = int((datetime.now() + timedelta(seconds=data.get('expires_in', 3600))).timestamp())
-                
-                token_data = TokenData(
-                    access_token=data['access_token'],
-                    refresh_token=refresh_token,  # Refresh token stays the same
-                    expires_at=expires_at,
-                    scope=data.get('scope', ''),
-                    token_type=data.get('token_type', 'Bearer'),
-                )
-                
-                logger.info("Successfully refreshed access token")
-                return token_data
-                
+            client = self._http_client()
+            response = await client.post(
+                TOKEN_URI,
+                data={
+                    **self._token_post_base,
+                    "refresh_token": refresh_token,
+                    "grant_type": "refresh_token",
+                },
+                timeout=10.0,
+            )
+            
+            response.raise_for_status()
+            
+            # Google normally omits the refresh token here; keep the current one
+            token_data = self._parse_token_response(response.content, refresh_token)
+            
+            logger.info("Successfully refreshed access token")
+            return token_data
+            
         except Exception as e:
-            logger.error(f"Failed to refresh token: {e}", exc_info=True)
+            logger.error("Failed to refresh token: %s", e, exc_info=True)
             raise ValueError(f"Token refresh failed: {str(e)}")
     
+    async def refresh_many(self, refresh_tokens: list[str]) -> list[TokenData | BaseException]:
+        """
+        Refresh several access tokens concurrently
+        
+        Requests share the HTTP/2 connection to Google's token endpoint, so a
+        batch costs roughly one round trip instead of one per token.
+        
+        Args:
+            refresh_tokens: Refresh tokens to use
+            
+        Returns:
+            One entry per refresh token, in order: the new TokenData, or the
+            exception (ValueError) raised for that token
+        """
+        async def refresh_one(refresh_token: str) -> TokenData:
+            async with self._refresh_sem:
+                return await self.refresh_access_token(refresh_token)
+        
+        return await asyncio.gather(
+            *(refresh_one(rt) for rt in refresh_tokens),
+            return_exceptions=True,
+        )
+    
     async def get_user_email(self, access_token: str) -> str:
         """
         Get user's email address using access token
@@ -192,22 +259,25 @@ class OAuthService:
         logger.info("Fetching user email from Gmail API")
         
         try:
-            # Create credentials
-            credentials = Credentials(token=access_token)
-            
-            # Build Gmail service
-            service = build('gmail', 'v1', credentials=credentials)
+            # Read the profile straight from the REST endpoint; the discovery
+            # client would download the whole API description and block the loop
+            client = self._http_client()
+            response = await client.get(
+                GMAIL_PROFILE_URL,
+                headers={"Authorization": f"Bearer {access_token}"},
+                timeout=10.0,
+            )
             
-            # Get user profile
-            profile = service.users().getProfile(userId='me').execute()
+            response.raise_for_status()
+            profile = orjson.loads(response.content)
             
             email = profile['emailAddress']
-            logger.info(f"Retrieved user email: {email}")
+            logger.info("Retrieved user email: %s", email)
             
             return email
             
         except Exception as e:
-            logger.error(f"Failed to get user email: {e}", exc_info=True)
+            logger.error("Failed to get user email: %s", e, exc_info=True)
             raise ValueError(f"Failed to retrieve user email: {str(e)}")
     
     def is_token_expired(self, expires_at: int, buffer_minutes: int = 5) -> bool:
@@ -221,10 +291,7 @@ class OAuthService:
         Returns:
             True if expired or about to expire
         """
-        buffer_seconds = buffer_minutes * 60
-        current_time = datetime.now().timestamp()
-        
-        return current_time >= (expires_at - buffer_seconds)
+        return time.time() >= expires_at - buffer_minutes * 60
     
     async def validate_tokens(self, access_token: str) -> bool:
         """
@@ -236,12 +303,18 @@ class OAuthService:
         Returns:
             True if valid, False otherwise
         """
+        # tokeninfo answers 200 only for a live token, and costs no Gmail quota
         try:
-            # Try to get user email - if it works, token is valid
-            await self.get_user_email(access_token)
-            return True
-        except Exception:
+            client = self._http_client()
+            response = await client.get(
+                TOKENINFO_URL,
+                params={"access_token": access_token},
+                timeout=10.0,
+            )
+        except httpx.HTTPError:
             return False
+        
+        return response.status_code == 200
 
 
 # Global instance
@@ -0,0 +1,116 @@
+"""
+Shared test fixtures for the backend
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Backend modules import each other as top-level packages (config, db, ...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# OAuthService refuses to load without credentials
+os.environ.setdefault("GOOGLE_CLIENT_ID", "test-client-id.apps.googleusercontent.com")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "test-client-secret")
+
+from config import settings  # noqa: E402
+from db.database import prepare_schema  # noqa: E402
+import db.models  # noqa: E402,F401  (registers the tables on Base.metadata)
+from services.callback_server import OAuthCallbackServer  # noqa: E402
+
+
+def memory_engine() -> AsyncEngine:
+    """Create an engine on an empty in-memory SQLite database"""
+    return create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,  # one shared connection, so the database persists
+    )
+
+
+def session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    """Session factory configured like db.database.AsyncSessionLocal"""
+    return async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+    )
+
+
+@pytest.fixture
+async def engine():
+    """Fresh in-memory SQLite database with the current schema"""
+    engine = memory_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(prepare_schema)
+    
+    yield engine
+    
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db(engine):
+    """Session bound to the in-memory database"""
+    async with session_factory(engine)() as session:
+        yield session
+
+
+@pytest.fixture
+def query_counter(engine):
+    """
+    Count the SQL statements executed on the engine
+    
+    Returns a list that collects each statement; use len() for the count.
+    """
+    statements: list[str] = []
+    
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+@pytest.fixture
+async def callback(monkeypatch):
+    """Callback server on an ephemeral port with a short idle grace period"""
+    monkeypatch.setattr(settings, "oauth_callback_port", 0)
+    monkeypatch.setattr(settings, "oauth_callback_idle_seconds", 0.05)
+    
+    server = OAuthCallbackServer()
+    yield server
+    
+    await server.stop()
+
+
+def port_of(callback: OAuthCallbackServer) -> int:
+    """Port the running callback server listens on"""
+    return callback.server.sockets[0].getsockname()[1]
+
+
+async def send_callback(port: int, query: str) -> int:
+    """Send a callback request like the browser would; returns the status code"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /callback?{query} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    
+    status_line = await reader.readline()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+async def wait_until_stopped(callback: OAuthCallbackServer, timeout: float = 2.0) -> None:
+    """Wait for the callback server's idle stop"""
+    async with asyncio.timeout(timeout):
+        while callback.is_running:
+            await asyncio.sleep(0.01)
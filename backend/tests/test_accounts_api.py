@@ -0,0 +1,202 @@
+"""
+Tests for the OAuth sign-in endpoints
+"""
+
+import asyncio
+import base64
+import hashlib
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import api.accounts
+from config import settings
+from db.crud import AccountCRUD
+from db.database import get_db
+from models.account import TokenData
+from services.oauth_service import oauth_service
+from tests.conftest import port_of, send_callback, wait_until_stopped
+
+
+@pytest.fixture
+def exchanges() -> list[tuple[str, str, str]]:
+    """(code, state, code_verifier) of every token exchange the client made"""
+    return []
+
+
+@pytest.fixture
+async def client(db, callback, exchanges, monkeypatch):
+    """API client wired to the test database and callback server"""
+    monkeypatch.setattr(api.accounts, "callback_server", callback)
+    api.accounts.active_oauth_flows.clear()
+    
+    async def fake_exchange(code: str, state: str, code_verifier: str) -> TokenData:
+        exchanges.append((code, state, code_verifier))
+        return TokenData(
+            access_token=f"access-{code}",
+            refresh_token="refresh",
+            expires_at=0,
+            scope="",
+            token_type="Bearer",
+        )
+    
+    async def fake_email(access_token: str) -> str:
+        return "user@example.com"
+    
+    monkeypatch.setattr(oauth_service, "exchange_code_for_tokens", fake_exchange)
+    monkeypatch.setattr(oauth_service, "get_user_email", fake_email)
+    
+    app = FastAPI()
+    app.include_router(api.accounts.router, prefix="/accounts")
+    app.dependency_overrides[get_db] = lambda: db
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def start(client: httpx.AsyncClient) -> str:
+    response = await client.post("/accounts/authorize/start")
+    assert response.status_code == 200
+    return response.json()["state"]
+
+
+def complete(client: httpx.AsyncClient, state: str) -> asyncio.Task:
+    return asyncio.create_task(
+        client.post("/accounts/authorize/complete", params={"state": state})
+    )
+
+
+async def test_sign_in_creates_account_and_releases_flow(client, callback):
+    state = await start(client)
+    completion = complete(client, state)
+    await asyncio.sleep(0.05)
+    
+    assert await send_callback(port_of(callback), f"code=abc&state={state}") == 200
+    response = await completion
+    
+    assert response.status_code == 200
+    assert response.json()["account"]["email"] == "user@example.com"
+    assert response.json()["tokens"]["access_token"] == "access-abc"
+    assert callback._pending == {}
+    await wait_until_stopped(callback)
+
+
+async def test_sign_in_uses_pkce(client, callback, exchanges):
+    response = await client.post("/accounts/authorize/start")
+    query = parse_qs(urlsplit(response.json()["auth_url"]).query)
+    state = response.json()["state"]
+    completion = complete(client, state)
+    await asyncio.sleep(0.05)
+    
+    assert await send_callback(port_of(callback), f"code=abc&state={state}") == 200
+    assert (await completion).status_code == 200
+    
+    [(_, _, verifier)] = exchanges
+    challenge = base64.urlsafe_b64encode(hashlib.sha256(verifier.encode()).digest())
+    assert query["code_challenge_method"] == ["S256"]
+    assert query["code_challenge"] == [challenge.rstrip(b"=").decode()]
+    await wait_until_stopped(callback)
+
+
+async def test_abandoned_sign_ins_are_released(client, callback, monkeypatch):
+    monkeypatch.setattr(settings, "oauth_timeout_seconds", 0.05)
+    
+    for _ in range(3):
+        await start(client)
+    assert len(callback._pending) == 3
+    
+    await wait_until_stopped(callback)
+    assert callback._pending == {}
+
+
+async def test_expired_state_is_rejected_and_released(client, callback):
+    state = await start(client)
+    
+    # As if the TTL entry expired before the callback server's own expiry
+    api.accounts.active_oauth_flows.clear()
+    response = await client.post("/accounts/authorize/complete", params={"state": state})
+    
+    assert response.status_code == 400
+    assert callback._pending == {}
+
+
+async def test_forged_state_is_rejected(client, callback):
+    state = await start(client)
+    completion = complete(client, state)
+    await asyncio.sleep(0.05)
+    
+    forged = await client.post("/accounts/authorize/complete", params={"state": "forged"})
+    assert forged.status_code == 400
+    assert await send_callback(port_of(callback), "code=evil&state=forged") == 400
+    
+    # The real flow is unaffected
+    assert await send_callback(port_of(callback), f"code=abc&state={state}") == 200
+    assert (await completion).status_code == 200
+
+
+async def test_replayed_state_is_rejected(client, callback):
+    state = await start(client)
+    completion = complete(client, state)
+    await asyncio.sleep(0.05)
+    
+    replay = await client.post("/accounts/authorize/complete", params={"state": state})
+    assert replay.status_code == 400
+    
+    # The replay must not have released the flow being completed
+    assert await send_callback(port_of(callback), f"code=abc&state={state}") == 200
+    assert (await completion).status_code == 200
+    
+    again = await client.post("/accounts/authorize/complete", params={"state": state})
+    assert again.status_code == 400
+
+
+async def test_duplicate_account_conflicts(client, callback, db):
+    await AccountCRUD.create(db, email="User@Example.com")
+    await db.commit()
+    
+    state = await start(client)
+    completion = complete(client, state)
+    await asyncio.sleep(0.05)
+    
+    assert await send_callback(port_of(callback), f"code=abc&state={state}") == 200
+    response = await completion
+    
+    assert response.status_code == 409
+    assert callback._pending == {}
+
+
+async def test_callback_timeout(client, callback, monkeypatch):
+    monkeypatch.setattr(settings, "oauth_timeout_seconds", 0.1)
+    state = await start(client)
+    
+    response = await client.post("/accounts/authorize/complete", params={"state": state})
+    
+    assert response.status_code == 408
+    assert callback._pending == {}
+    await wait_until_stopped(callback)
+
+
+async def test_list_accounts(client, db):
+    for email in ("first@example.com", "second@example.com"):
+        await AccountCRUD.create(db, email=email)
+    await db.commit()
+    
+    response = await client.get("/accounts/list")
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 2
+    assert [a["email"] for a in body["accounts"]] == ["second@example.com", "first@example.com"]
+    assert set(body["accounts"][0]) == {
+        "id",
+        "email",
+        "display_name",
+        "added_timestamp",
+        "last_sync_timestamp",
+        "is_realtime_enabled",
+        "status",
+        "pending_subscriptions_count",
+    }
@@ -0,0 +1,82 @@
+"""
+Tests for the OAuth callback server
+"""
+
+import asyncio
+
+from config import settings
+
+from tests.conftest import port_of, send_callback, wait_until_stopped
+
+
+async def test_callback_resolves_waiting_flow(callback):
+    await callback.acquire("state-a")
+    waiter = asyncio.create_task(callback.wait_for_callback("state-a", timeout_seconds=2))
+    
+    assert await send_callback(port_of(callback), "code=abc&state=state-a") == 200
+    assert await waiter == ("abc", "state-a")
+
+
+async def test_idle_connection_does_not_block_shutdown(callback):
+    await callback.acquire("state-a")
+    
+    # Like a browser preconnect: opened, never sends a request
+    _, idle_writer = await asyncio.open_connection("127.0.0.1", port_of(callback))
+    await asyncio.sleep(0.05)
+    
+    await callback.release("state-a")
+    await wait_until_stopped(callback)
+    
+    # The lifecycle lock must have been released again
+    await asyncio.wait_for(callback.acquire("state-b"), timeout=1)
+    assert callback.is_running
+    
+    idle_writer.close()
+
+
+async def test_forged_state_is_rejected_without_resolving(callback):
+    await callback.acquire("state-a")
+    waiter = asyncio.create_task(callback.wait_for_callback("state-a", timeout_seconds=2))
+    
+    assert await send_callback(port_of(callback), "code=evil&state=forged") == 400
+    assert await send_callback(port_of(callback), "code=evil") == 400
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+    
+    assert await send_callback(port_of(callback), "code=abc&state=state-a") == 200
+    assert await waiter == ("abc", "state-a")
+
+
+async def test_release_of_unknown_state_keeps_other_flows(callback):
+    await callback.acquire("state-a")
+    
+    await callback.release("never-acquired")
+    await callback.release("never-acquired")
+    
+    assert len(callback._pending) == 1
+    await asyncio.sleep(0.1)
+    assert callback.is_running
+
+
+async def test_unclaimed_flows_expire(callback, monkeypatch):
+    monkeypatch.setattr(settings, "oauth_timeout_seconds", 0.05)
+    
+    for state in ("state-a", "state-b", "state-c"):
+        await callback.acquire(state)
+    assert len(callback._pending) == 3
+    
+    await wait_until_stopped(callback)
+    assert callback._pending == {}
+    assert callback._expiry_timers == {}
+
+
+async def test_claimed_flow_does_not_expire(callback, monkeypatch):
+    monkeypatch.setattr(settings, "oauth_timeout_seconds", 0.05)
+    await callback.acquire("state-a")
+    waiter = asyncio.create_task(callback.wait_for_callback("state-a", timeout_seconds=2))
+    
+    await asyncio.sleep(0.15)
+    await callback.release_if_unclaimed("state-a")
+    
+    assert await send_callback(port_of(callback), "code=abc&state=state-a") == 200
+    assert await waiter == ("abc", "state-a")
@@ -0,0 +1,46 @@
+"""
+Tests for AccountCRUD
+"""
+
+from db.crud import AccountCRUD
+
+
+async def test_get_all_is_bounded_query_count(db, query_counter):
+    # get_all is the ORM read that relationship loading will go through;
+    # raiseload keeps it from growing one lazy query per row meanwhile
+    for i in range(25):
+        await AccountCRUD.create(db, email=f"user{i}@example.com")
+    await db.commit()
+    query_counter.clear()
+    
+    accounts = await AccountCRUD.get_all(db)
+    
+    assert len(accounts) == 25
+    assert len(query_counter) <= 2
+
+
+async def test_get_all_rows_is_single_query(db, query_counter):
+    # /accounts/list reads through get_all_rows
+    for i in range(25):
+        await AccountCRUD.create(db, email=f"user{i}@example.com")
+    await db.commit()
+    query_counter.clear()
+    
+    rows = await AccountCRUD.get_all_rows(db)
+    
+    assert len(rows) == 25
+    assert len(query_counter) == 1
+
+
+async def test_get_all_orders_newest_first(db):
+    for email in ("first@example.com", "second@example.com", "third@example.com"):
+        await AccountCRUD.create(db, email=email)
+    await db.commit()
+    
+    accounts = await AccountCRUD.get_all(db)
+    
+    assert [a.email for a in accounts] == [
+        "third@example.com",
+        "second@example.com",
+        "first@example.com",
+    ]
@@ -0,0 +1,144 @@
+"""
+Tests for schema migration of databases created by older releases
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from db.crud import AccountCRUD
+from db.database import prepare_schema
+from tests.conftest import memory_engine, session_factory
+
+
+# accounts table as created by the first release
+BASELINE_ACCOUNTS_DDL = (
+    """
+    CREATE TABLE accounts (
+        id INTEGER NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        display_name VARCHAR(255),
+        added_timestamp DATETIME NOT NULL,
+        last_sync_timestamp DATETIME,
+        is_realtime_enabled BOOLEAN NOT NULL,
+        status VARCHAR(50) NOT NULL,
+        pending_subscriptions_count INTEGER NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE UNIQUE INDEX ix_accounts_email ON accounts (email)",
+)
+
+
+@pytest.fixture
+async def baseline_engine():
+    """In-memory database holding a baseline accounts table with one row"""
+    engine = memory_engine()
+    async with engine.begin() as conn:
+        for statement in BASELINE_ACCOUNTS_DDL:
+            await conn.execute(text(statement))
+        await conn.execute(text(
+            "INSERT INTO accounts VALUES "
+            "(1, 'old@example.com', 'Old', '2024-01-02 03:04:05.000000', NULL, 1, 'active', 4)"
+        ))
+        await conn.execute(text(
+            "INSERT INTO accounts VALUES "
+            "(2, 'Foo@Gmail.com', NULL, '2024-02-03 04:05:06.000000', NULL, 0, 'active', 0)"
+        ))
+    
+    yield engine
+    
+    await engine.dispose()
+
+
+async def migrate(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(prepare_schema)
+
+
+async def test_migration_keeps_existing_rows(baseline_engine):
+    await migrate(baseline_engine)
+    
+    async with session_factory(baseline_engine)() as db:
+        account = await AccountCRUD.get_by_email(db, "old@example.com")
+    
+    assert account is not None
+    assert account.id == 1
+    assert account.display_name == "Old"
+    assert account.added_timestamp == datetime(2024, 1, 2, 3, 4, 5)
+    assert account.is_realtime_enabled is True
+    assert account.pending_subscriptions_count == 4
+
+
+async def test_migrated_table_accepts_new_accounts(baseline_engine):
+    await migrate(baseline_engine)
+    
+    async with session_factory(baseline_engine)() as db:
+        account = await AccountCRUD.create(db, email="new@example.com")
+        await db.commit()
+    
+    assert account.id == 3
+    assert account.added_timestamp is not None
+
+
+async def test_migration_is_idempotent(baseline_engine):
+    await migrate(baseline_engine)
+    await migrate(baseline_engine)
+    
+    async with session_factory(baseline_engine)() as db:
+        accounts = await AccountCRUD.get_all(db)
+    
+    assert [a.email for a in accounts] == ["Foo@Gmail.com", "old@example.com"]
+
+
+async def test_migration_keeps_stored_email_spelling(baseline_engine):
+    await migrate(baseline_engine)
+    
+    # Electron keys each account's tokens by the exact stored email
+    async with baseline_engine.connect() as conn:
+        email = await conn.scalar(text("SELECT email FROM accounts WHERE id = 2"))
+    
+    assert email == "Foo@Gmail.com"
+
+
+@pytest.mark.parametrize("lookup", ["Foo@Gmail.com", "foo@gmail.com", " FOO@GMAIL.COM "])
+async def test_migrated_mixed_case_email_is_reachable(baseline_engine, lookup):
+    await migrate(baseline_engine)
+    
+    async with session_factory(baseline_engine)() as db:
+        account = await AccountCRUD.get_by_email(db, lookup)
+        updated = await AccountCRUD.set_realtime_enabled(db, lookup, True)
+        deleted = await AccountCRUD.delete(db, lookup)
+    
+    assert account is not None and account.id == 2
+    assert account.email == "Foo@Gmail.com"
+    assert updated is not None and updated.is_realtime_enabled is True
+    assert deleted is True
+
+
+async def test_migration_collapses_case_duplicates(baseline_engine):
+    async with baseline_engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO accounts VALUES "
+            "(3, 'foo@gmail.com', NULL, '2024-03-04 05:06:07.000000', NULL, 0, 'active', 0)"
+        ))
+    
+    await migrate(baseline_engine)
+    
+    async with session_factory(baseline_engine)() as db:
+        accounts = await AccountCRUD.get_all(db)
+    
+    # The earliest row wins
+    assert sorted(a.id for a in accounts) == [1, 2]
+
+
+async def test_migrated_email_column_compares_case_insensitively(baseline_engine):
+    await migrate(baseline_engine)
+    
+    async with baseline_engine.connect() as conn:
+        count = await conn.scalar(text(
+            "SELECT count(*) FROM accounts WHERE email = 'FOO@GMAIL.COM'"
+        ))
+    
+    assert count == 1
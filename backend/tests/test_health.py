@@ -0,0 +1,41 @@
+"""
+Tests for the health endpoints
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import api.health
+from main import create_app
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_health_reports_healthy(client):
+    response = await client.get("/health")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["status"] == "healthy"
+
+
+async def test_health_body_is_rebuilt_once_stale(client, monkeypatch):
+    monkeypatch.setattr(api.health, "HEALTH_REFRESH_INTERVAL_SECONDS", 0.05)
+    first = (await client.get("/health")).json()["timestamp"]
+    
+    assert (await client.get("/health")).json()["timestamp"] == first
+    await asyncio.sleep(0.06)
+    assert (await client.get("/health")).json()["timestamp"] != first
+
+
+async def test_ping(client):
+    response = await client.get("/ping")
+    
+    assert response.json() == {"message": "pong"}
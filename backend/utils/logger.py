@@ -2,53 +2,70 @@
 Centralized logging utility for the backend
 """
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
 from config import settings
 
 
-class BackendLogger:
-    """Logger configuration for the backend"""
-    
-    def __init__(self, name: str = "backend"):
-        self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG if settings.debug else logging.INFO)
-        
-        # Prevent duplicate handlers
-        if not self.logger.handlers:
-            self._setup_handlers()
-    
-    def _setup_handlers(self):
-        """Set up logging handlers for both file and console"""
-        
-        # Console handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter(
-            '[%(asctime)s] [%(levelname)s] %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
-        
-        # File handler
-        log_file = settings.logs_dir / f"backend-{datetime.now().strftime('%Y-%m-%d')}.log"
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(logging.DEBUG)
-        file_formatter = logging.Formatter(
-            '[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        file_handler.setFormatter(file_formatter)
-        self.logger.addHandler(file_handler)
-    
-    def get_logger(self) -> logging.Logger:
-        """Get the configured logger instance"""
-        return self.logger
+# Shared backend logger; handlers are attached by configure_logging()
+logger = logging.getLogger("backend")
 
 
-# Global logger instance
-logger = BackendLogger().get_logger()
-
+def configure_logging() -> None:
+    """
+    Set up logging handlers for both file and console
+    
+    Called once at startup; later calls are no-ops. Records are handed to a
+    queue and written by a listener thread, so request handlers never wait
+    on console or disk I/O.
+    """
+    if logger.handlers:
+        return
+    
+    logger.setLevel(logging.DEBUG if settings.debug else logging.INFO)
+    
+    # Our handlers are the only output; don't repeat records via the root logger
+    logger.propagate = False
+    
+    # Console handler
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.INFO)
+    console_formatter = logging.Formatter(
+        '[%(asctime)s] [%(levelname)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    console_handler.setFormatter(console_formatter)
+    
+    # File handler (size-capped, rotated within the day's file)
+    log_file = settings.logs_dir / f"backend-{datetime.now().strftime('%Y-%m-%d')}.log"
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=10 * 1024 * 1024,
+        backupCount=5,
+        encoding='utf-8',
+    )
+    file_handler.setLevel(logging.DEBUG)
+    file_formatter = logging.Formatter(
+        '[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    file_handler.setFormatter(file_formatter)
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    
+    listener = QueueListener(
+        log_queue,
+        console_handler,
+        file_handler,
+        respect_handler_level=True,
+    )
+    listener.start()
+    
+    # Drain the queue before logging's own shutdown closes the handlers
+    atexit.register(listener.stop)
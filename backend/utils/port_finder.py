@@ -3,6 +3,7 @@ Dynamic Port Allocation Utility
 FR-2.1.4: Find and claim an available network port
 """
 
+import random
 import socket
 from config import settings
 from utils.logger import logger
@@ -11,6 +12,29 @@ from utils.logger import logger
 class PortFinder:
     """Utility to find available network ports"""
     
+    @staticmethod
+    def bind_port(port: int) -> socket.socket:
+        """
+        Create a TCP socket bound to a port on the configured host
+        
+        Args:
+            port: Port number to bind (0 lets the OS pick one)
+            
+        Returns:
+            Bound (not yet listening) socket; the caller owns it
+            
+        Raises:
+            OSError: If the port can't be bound
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((settings.host, port))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    
     @staticmethod
     def is_port_available(port: int) -> bool:
         """
@@ -23,34 +47,63 @@ class PortFinder:
             True if port is available, False otherwise
         """
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                sock.bind((settings.host, port))
-                return True
+            PortFinder.bind_port(port).close()
+            return True
         except OSError:
             return False
     
     @staticmethod
-    def find_available_port() -> int:
+    def reserve_port() -> socket.socket:
         """
-        Find an available port within the configured range
+        Bind a socket to an available port
         FR-2.1.4: Dynamic port allocation
         
+        Lets the OS assign an ephemeral port with a single bind, unless
+        settings.use_port_range asks for a port in the configured range.
+        Handing the bound socket to the server (instead of just the port
+        number) leaves no window for another process to take the port.
+        
         Returns:
-            Available port number
+            Bound socket
             
         Raises:
             RuntimeError: If no available port is found in the range
         """
-        logger.info(
-            f"Searching for available port in range "
-            f"{settings.port_range_start}-{settings.port_range_end}"
-        )
+        if settings.use_port_range:
+            return PortFinder._reserve_port_in_range()
         
-        for port in range(settings.port_range_start, settings.port_range_end + 1):
-            if PortFinder.is_port_available(port):
-                logger.info(f"Found available port: {port}")
-                return port
+        sock = PortFinder.bind_port(0)
+        logger.info("OS assigned available port: %s", sock.getsockname()[1])
+        return sock
+    
+    @staticmethod
+    def _reserve_port_in_range() -> socket.socket:
+        """
+        Bind a socket to the first free port in the configured range
+        
+        Probing starts at a random offset (wrapping around) so concurrent
+        instances don't all walk the same occupied ports first.
+        
+        Returns:
+            Bound socket
+            
+        Raises:
+            RuntimeError: If no available port is found in the range
+        """
+        start = settings.port_range_start
+        size = settings.port_range_end - start + 1
+        
+        logger.info("Searching for available port in range %s-%s", start, settings.port_range_end)
+        
+        offset = random.randrange(size)
+        for i in range(size):
+            port = start + (offset + i) % size
+            try:
+                sock = PortFinder.bind_port(port)
+            except OSError:
+                continue
+            logger.info("Found available port: %s", port)
+            return sock
         
         error_msg = (
             f"No available ports found in range "
@@ -59,6 +112,21 @@ class PortFinder:
         logger.error(error_msg)
         raise RuntimeError(error_msg)
     
+    @staticmethod
+    def find_available_port() -> int:
+        """
+        Find an available port
+        FR-2.1.4: Dynamic port allocation
+        
+        Prefer reserve_port() when the caller can use the socket itself;
+        the port returned here may be taken again before it is bound.
+        
+        Returns:
+            Available port number
+        """
+        with PortFinder.reserve_port() as sock:
+            return sock.getsockname()[1]
+    
     @staticmethod
     def announce_port(port: int) -> None:
         """
@@ -70,5 +138,5 @@ class PortFinder:
         """
         # Use a specific format that Electron can parse
         print(f"PORT:{port}", flush=True)
-        logger.info(f"Port announced to parent process: {port}")
+        logger.info("Port announced to parent process: %s", port)
 